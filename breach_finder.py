@@ -7,118 +7,306 @@ score exposures by severity, and write CSV / JSON / Markdown outputs.
 Keep this project ethical: use fictional or authorized test data only.
 """
 import argparse
+import asyncio
 import os
+import tempfile
 import sys
 import json
 import time
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterator, Optional
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+# Columns read from the offline dataset (password_hash is optional)
+OFFLINE_COLUMNS = ["email", "source", "breach_date", "compromised_data", "password_hash"]
+
+# Streaming read sizes for the offline dataset (CSV blocks in bytes, Parquet batches in rows)
+OFFLINE_BLOCK_BYTES = 16 << 20
+OFFLINE_CHUNK_ROWS = 200_000
+
+# Bits for the data-type keyword groups scored by severity_scores
+DATA_PWD = 1    # password / pwd / hash   -> +3
+DATA_EMAIL = 2  # email / username        -> +1
+DATA_PII = 4    # phone / address / dob   -> +1
 
 # ---- Helpers ----
 
+def positive_float(value: str) -> float:
+    """
+    argparse type for options that must be a number greater than zero.
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {value!r}")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
 def parse_args():
     """
     Parse command-line arguments.
     --domain : filter matches by email domain (e.g., example.com)
     --emails : path to a file with one email per line
-    --offline: path to offline CSV with breach records
+    --offline: path to offline CSV (or .parquet) with breach records
+    --offline-parquet: optional Parquet copy of --offline, rebuilt when built from a different/changed CSV
     --out    : output directory for generated reports
     --max-hibp: optional cap for HIBP lookups (0 = skip)
+    --hibp-rps: HIBP request rate allowed by your API key (requests per second)
+    --pretty : indent results.json for human reading (default is compact)
     """
     p = argparse.ArgumentParser(description="OSINT Breach & Credential Exposure Tracker")
     g = p.add_mutually_exclusive_group(required=False)
     g.add_argument("--domain", help="Filter by domain, e.g., example.com")
     g.add_argument("--emails", help="Path to file with one email per line")
     p.add_argument("--offline", default="sample_data/sample_breaches.csv",
-                   help="Offline breach CSV (email,source,breach_date,compromised_data,password_hash(optional))")
+                   help="Offline breach CSV (email,source,breach_date,compromised_data,password_hash(optional)); .parquet is also accepted")
+    p.add_argument("--offline-parquet",
+                   help="Parquet copy of --offline to load from; created/rebuilt when missing or built from a different/changed CSV")
     p.add_argument("--out", default="examples", help="Output directory")
     p.add_argument("--max-hibp", type=int, default=0, help="Max number of HIBP lookups (0 = skip)")
+    p.add_argument("--hibp-rps", type=positive_float, default=2.0, help="HIBP requests per second allowed by your API key")
+    p.add_argument("--pretty", action="store_true", help="Write indented (human-readable) results.json")
     return p.parse_args()
 
-def load_offline_dataset(path: str) -> pd.DataFrame:
+def offline_column_map(path: str) -> Dict[str, str]:
     """
-    Load the offline CSV of breach records and normalize expected columns.
-    Expected columns (case-insensitive): email, source, breach_date, compromised_data
-    Optionally: password_hash
-    Returns a pandas DataFrame with breach_date parsed as datetime.
+    Map lower-case column names to the actual names in the offline file's header/schema.
+    Raises if any of the expected columns (case-insensitive) are missing:
+      email, source, breach_date, compromised_data (password_hash is optional)
     """
     if not os.path.exists(path):
         raise FileNotFoundError(f"Offline dataset not found: {path}")
-    df = pd.read_csv(path)
+    if path.lower().endswith(".parquet"):
+        names = pq.read_schema(path).names
+    else:
+        names = pd.read_csv(path, nrows=0).columns
+    colmap = {c.lower(): c for c in names if c.lower() in OFFLINE_COLUMNS}
 
     # Ensure required columns exist (case-insensitive)
     expected = {"email", "source", "breach_date", "compromised_data"}
-    missing = expected - set([c.lower() for c in df.columns])
+    missing = expected - set(colmap)
     if missing:
         raise ValueError(f"Offline CSV missing expected columns: {missing}")
+    return colmap
 
-    # Map columns to consistent lower-case names if necessary
-    colmap = {c.lower(): c for c in df.columns}
-    for need in list(expected) + ["password_hash"]:
-        if need in colmap:
-            df.rename(columns={colmap[need]: need}, inplace=True)
+def iter_offline_chunks(path: str) -> Iterator[pd.DataFrame]:
+    """
+    Stream the offline CSV (or Parquet file) as DataFrames of bounded size.
+    Only the tracker's columns are decoded (all as strings for CSV, breach_date included),
+    and they are renamed to consistent lower-case names.
+    """
+    colmap = offline_column_map(path)
+    rename = {actual: need for need, actual in colmap.items()}
+    cols = list(colmap.values())
+    if path.lower().endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=OFFLINE_CHUNK_ROWS, columns=cols):
+            yield batch.to_pandas().rename(columns=rename)
+        return
+
+    yielded = 0
+    try:
+        batches = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=OFFLINE_BLOCK_BYTES),
+            convert_options=pacsv.ConvertOptions(include_columns=cols, strings_can_be_null=True,
+                                                 column_types={c: pa.string() for c in cols}),
+        )
+        for batch in batches:
+            chunk = batch.to_pandas().rename(columns=rename)
+            yielded += len(chunk)
+            yield chunk
+    except pa.ArrowInvalid:
+        # Arrow rejects ragged rows (e.g. ones omitting the optional trailing password_hash);
+        # pandas' C parser pads them with NaN. Continue with it, skipping rows already yielded.
+        with pd.read_csv(path, usecols=cols, dtype=str, chunksize=OFFLINE_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                skip = min(yielded, len(chunk))
+                yielded -= skip
+                if skip < len(chunk):
+                    yield chunk.iloc[skip:].reset_index(drop=True).rename(columns=rename)
+
+def parse_breach_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse breach_date strings to datetimes (invalid -> NaT).
+    Each value's format is inferred on its own (ISO, 05/02/2016, ...), so results do not
+    depend on which rows (chunk or matches) happen to be parsed together.
+    """
+    return pd.to_datetime(values, format="mixed", errors="coerce")
 
-    # Convert breach_date to datetime (coerce invalid -> NaT)
-    df["breach_date"] = pd.to_datetime(df["breach_date"], errors="coerce")
+def load_offline_dataset(path: str, select: Optional[Callable[[pd.DataFrame], np.ndarray]] = None) -> pd.DataFrame:
+    """
+    Load the offline CSV (or Parquet file) of breach records and normalize expected columns.
+    Expected columns (case-insensitive): email, source, breach_date, compromised_data
+    Optionally: password_hash
+    The file is streamed in chunks; if `select` is given it is called on each chunk
+    (which already has _email_lower) and only rows where it returns True are kept,
+    so peak memory is bounded by the chunk size plus the matches.
+    Returns a pandas DataFrame with breach_date parsed as datetime and a helper
+    _email_lower column used for case-insensitive matching.
+    """
+    parts = []
+    for chunk in iter_offline_chunks(path):
+        # Lowercased email, computed once and shared by the filters (dropped on write)
+        chunk["_email_lower"] = chunk["email"].str.lower().astype("string")
+        kept = chunk if select is None else chunk[select(chunk)]
+        if not kept.empty:
+            parts.append(kept)
+    # Chunks share one all-string schema, so concatenation never falls back to object/mixed
+    # dtypes; a single matching chunk (the common case) is used as-is without a concat copy
+    if len(parts) == 1:
+        df = parts[0].reset_index(drop=True)
+    elif parts:
+        df = pd.concat(parts, ignore_index=True)
+    else:
+        df = pd.DataFrame({c: pd.Series(dtype="string") for c in list(offline_column_map(path)) + ["_email_lower"]})
+
+    # Parse breach_date only for the kept rows; Parquet copies already store timestamps (coerce invalid -> NaT)
+    if not pd.api.types.is_datetime64_any_dtype(df["breach_date"]):
+        df["breach_date"] = parse_breach_dates(df["breach_date"])
+
+    # Breach sources and data-type lists repeat heavily; categorical codes make them cheap to group/tokenize
+    df["source"] = df["source"].astype("category")
+    df["compromised_data"] = df["compromised_data"].astype("category")
     return df
 
+def save_offline_parquet(csv_path: str, parquet_path: str):
+    """
+    Convert the offline CSV to Parquet (zstd) chunk by chunk so later runs can skip CSV parsing.
+    breach_date is stored as a timestamp column, and the source CSV's path, size and mtime
+    are recorded in the schema metadata (see parquet_is_fresh). The file is written to a
+    temporary path next to parquet_path and only moved into place once every chunk succeeded,
+    so a failed conversion never leaves a truncated copy that parquet_is_fresh would accept.
+    """
+    source = offline_source_metadata(csv_path)
+    fd, tmp_path = tempfile.mkstemp(suffix=".parquet.tmp", dir=os.path.dirname(os.path.abspath(parquet_path)))
+    os.close(fd)
+    try:
+        writer = None
+        try:
+            for chunk in iter_offline_chunks(csv_path):
+                chunk["breach_date"] = parse_breach_dates(chunk["breach_date"]).astype("datetime64[us]")
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema.with_metadata({**(table.schema.metadata or {}), **source})
+                    writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+                writer.write_table(table.cast(writer.schema))
+            if writer is None:
+                # Header-only CSV: still write an (empty) copy with the expected column types
+                schema = pa.schema([(c, pa.timestamp("us") if c == "breach_date" else pa.string())
+                                    for c in offline_column_map(csv_path)], metadata=source)
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp_path, parquet_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def offline_source_metadata(csv_path: str) -> Dict[bytes, bytes]:
+    """
+    Identify the CSV a Parquet copy is built from: absolute path, size and mtime (ns).
+    Stored in the Parquet schema metadata and compared by parquet_is_fresh.
+    """
+    st = os.stat(csv_path)
+    return {
+        b"breach_finder.source_path": os.path.abspath(csv_path).encode("utf-8"),
+        b"breach_finder.source_size": str(st.st_size).encode("ascii"),
+        b"breach_finder.source_mtime_ns": str(st.st_mtime_ns).encode("ascii"),
+    }
+
+def parquet_is_fresh(csv_path: str, parquet_path: str) -> bool:
+    """
+    Return True if parquet_path exists and was built from csv_path as it is now
+    (same path, size and mtime); otherwise the copy must be rebuilt.
+    """
+    if not os.path.exists(parquet_path):
+        return False
+    try:
+        stored = pq.read_schema(parquet_path).metadata or {}
+    except pa.ArrowInvalid:
+        return False
+    return all(stored.get(k) == v for k, v in offline_source_metadata(csv_path).items())
+
 def read_emails_file(path: str) -> List[str]:
     """
     Read a plain text file containing one email address per line.
-    Returns a sorted list of unique emails (lowercasing handled later).
+    Returns a sorted list of unique, lowercased emails.
     """
-    emails = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            e = line.strip()
-            # Basic sanity check for an email-like string
-            if e and "@" in e:
-                emails.append(e)
-    return list(sorted(set(emails)))
+    with open(path, "rb") as f:
+        data = f.read()
+    # Basic sanity check for an email-like string, done on raw bytes before decoding
+    emails = {ln.decode("utf-8").strip().lower() for ln in data.splitlines() if b"@" in ln}
+    return sorted(emails)
 
-def filter_by_domain(df: pd.DataFrame, domain: str) -> pd.DataFrame:
+def filter_by_domain(df: pd.DataFrame, domain: str) -> np.ndarray:
     """
-    Return rows where the email ends with @<domain>.
+    Return a boolean mask of rows where the email ends with @<domain>.
     Uses case-insensitive comparison.
     """
-    return df[df["email"].str.lower().str.endswith(f"@{domain.lower()}")].copy()
+    return df["_email_lower"].str.endswith(f"@{domain.lower()}").to_numpy(dtype=bool, na_value=False)
 
-def filter_by_emails(df: pd.DataFrame, emails: List[str]) -> pd.DataFrame:
+def filter_by_emails(df: pd.DataFrame, emails: List[str]) -> np.ndarray:
     """
-    Return rows where the email is one of the provided email addresses.
+    Return a boolean mask of rows where the email is one of the provided email addresses.
+    Emails are expected to be lowercased already (see read_emails_file).
     """
-    emails_lower = set([e.lower() for e in emails])
-    return df[df["email"].str.lower().isin(emails_lower)].copy()
+    return df["_email_lower"].isin(emails).to_numpy()
 
-def severity_for_row(row) -> int:
+def tokenize_compromised_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Split compromised_data ("a | b | c") into one row per (record, data type).
+    Each distinct compromised_data value is split once and mapped back to rows via
+    its category code. Returns a long-form DataFrame with columns:
+      row (position in df), source, tok
+    """
+    cd = df["compromised_data"].astype("category")
+    parts = pd.Series(cd.cat.categories).str.strip().str.split(r"\s*\|\s*", regex=True).explode()
+    vocab = pd.DataFrame({"code": parts.index.to_numpy(), "tok": parts.to_numpy()})
+    rows = pd.DataFrame({"row": np.arange(len(df)), "code": cd.cat.codes.to_numpy()})
+    # Inner merge keeps row order, drops missing values (code -1)
+    tok_df = rows.merge(vocab, on="code", how="inner")
+    tok_df["source"] = df["source"].iloc[tok_df["row"].to_numpy()].to_numpy()
+    return tok_df[["row", "source", "tok"]]
+
+def severity_scores(df: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> np.ndarray:
     """
-    Compute a simple severity score (0-5) for a single breach row.
+    Compute a simple severity score (0-5) for every breach row at once.
     Scoring factors:
       - Recency: breaches within 1 year -> +2, within 3 years -> +1
       - Data sensitivity: passwords/hash -> +3, emails/usernames -> +1, personal data -> +1
-    The score is capped at 5.
-    """
-    sev = 0
-    # Recency factor (newer breaches are more severe)
-    if pd.notna(row["breach_date"]):
-        years = (pd.Timestamp.now() - row["breach_date"]).days / 365.25
-        if years < 1:
-            sev += 2
-        elif years < 3:
-            sev += 1
-
-    # Data type factors
-    dt = str(row.get("compromised_data", "")).lower()
-    if any(k in dt for k in ["password", "pwd", "hash"]):
-        sev += 3
-    if any(k in dt for k in ["email", "username"]):
-        sev += 1
-    if any(k in dt for k in ["phone", "address", "dob"]):
-        sev += 1
+    The score is capped at 5. Returns an int8 array aligned with df's rows.
+    `now` is the reference time for recency (defaults to the current time).
+    """
+    sev = np.zeros(len(df), dtype=np.int8)
+
+    # Recency factor (newer breaches are more severe); NaT compares False
+    if now is None:
+        now = pd.Timestamp.now()
+    years = ((now - df["breach_date"]).dt.days / 365.25).to_numpy()
+    sev += np.where(years < 1, 2, 0).astype(np.int8)
+    sev += np.where((years >= 1) & (years < 3), 1, 0).astype(np.int8)
+
+    # Data type factors: keyword scans run once per distinct compromised_data value,
+    # giving a bitmask per category that is mapped onto rows through the category codes
+    cd = df["compromised_data"].astype("category")
+    cats = pd.Series(cd.cat.categories).astype(str).str.lower()
+    cat_bits = (cats.str.contains("password|pwd|hash", regex=True).to_numpy(dtype=np.uint8) * DATA_PWD
+                | cats.str.contains("email|username", regex=True).to_numpy(dtype=np.uint8) * DATA_EMAIL
+                | cats.str.contains("phone|address|dob", regex=True).to_numpy(dtype=np.uint8) * DATA_PII)
+    # Trailing 0 so missing values (code -1) index to "no data types"
+    bits = np.append(cat_bits, 0).astype(np.uint8)[cd.cat.codes.to_numpy()]
+    sev += (3 * (bits & DATA_PWD) + ((bits & DATA_EMAIL) >> 1) + ((bits & DATA_PII) >> 2)).astype(np.int8)
 
     # Cap the severity
-    return min(sev, 5)
+    np.minimum(sev, 5, out=sev)
+    return sev
 
 def risk_band(score: float) -> str:
     """
@@ -148,27 +336,45 @@ def summarize(df: pd.DataFrame) -> Dict[str, Any]:
             "risk_band": "Low"
         }
 
-    df = df.copy()
-    # Compute severity for each matched record
-    df["severity"] = df.apply(severity_for_row, axis=1)
+    # One reference time for the whole report
+    now = pd.Timestamp.now()
+
+    # Compute severity for each matched record (kept as an array; the input frame is not copied)
+    sev = severity_scores(df, now)
+
+    # Per-breach aggregates in a single groupby pass
+    agg = df.groupby("source", sort=False, observed=True, as_index=False).agg(
+        records=("email", "size"),
+        latest_breach_date=("breach_date", "max"),
+    )
+    avg_sev = pd.Series(sev, index=df.index).groupby(df["source"], sort=False, observed=True).mean()
+    agg["avg_severity"] = avg_sev.reindex(agg["source"]).to_numpy()
+    # Distinct emails per breach: one hash pass over (source, email) pairs, then count per group
+    unique_pairs = df[["source", "email"]].dropna().drop_duplicates()
+    unique_counts = unique_pairs.groupby("source", sort=False, observed=True).size()
+    agg["unique_emails"] = unique_counts.reindex(agg["source"], fill_value=0).to_numpy()
+    agg["risk_band"] = agg["avg_severity"].map(risk_band)
+
+    # Top compromised data types per breach (simple frequency, first-seen order on ties)
+    tokens = tokenize_compromised_data(df)
+    counts = tokens.groupby(["source", "tok"], sort=False, observed=True).size().reset_index(name="c")
+    top = counts.sort_values("c", ascending=False, kind="stable").groupby("source", sort=False, observed=True).head(5)
+    top_by_source = top.groupby("source", sort=False, observed=True)["tok"].agg(list).to_dict()
 
     per_breach = []
-    # Group records by breach source and compute aggregates
-    for source, g in df.groupby("source"):
-        sev_avg = float(g["severity"].mean())
-        latest = g["breach_date"].max()
+    for row in agg.to_dict("records"):
+        latest = row["latest_breach_date"]
         per_breach.append({
-            "source": source,
-            "records": int(len(g)),
-            "unique_emails": int(g["email"].nunique()),
+            "source": row["source"],
+            "records": int(row["records"]),
+            "unique_emails": int(row["unique_emails"]),
             "latest_breach_date": None if pd.isna(latest) else latest.date().isoformat(),
-            "avg_severity": round(sev_avg, 2),
-            "risk_band": risk_band(sev_avg),
-            # List top compromised data types in this breach (simple frequency)
-            "compromised_data_top": list(pd.Series(" | ".join(g["compromised_data"].astype(str)).split("|")).str.strip().value_counts().head(5).index)
+            "avg_severity": round(float(row["avg_severity"]), 2),
+            "risk_band": row["risk_band"],
+            "compromised_data_top": top_by_source.get(row["source"], []),
         })
 
-    overall_score = float(df["severity"].mean())
+    overall_score = float(sev.mean())
     out = {
         "generated_at": datetime.utcnow().isoformat() + "Z",
         "total_exposed_accounts": int(len(df)),
@@ -176,40 +382,76 @@ def summarize(df: pd.DataFrame) -> Dict[str, Any]:
         "distinct_breaches": int(df["source"].nunique()),
         "risk_score": round(overall_score, 2),
         "risk_band": risk_band(overall_score),
-        # Sort breaches by avg severity then by number of records (descending)
-        "breaches": sorted(per_breach, key=lambda x: (-x["avg_severity"], -x["records"])),
+        # Sort breaches by avg severity then by number of records (descending), then by name
+        "breaches": sorted(per_breach, key=lambda x: (-x["avg_severity"], -x["records"], x["source"])),
     }
     return out
 
-def write_outputs(outdir: str, df_matches: pd.DataFrame, summary: Dict[str, Any]):
+def sort_codes(values: pd.Series) -> np.ndarray:
+    """
+    Return int64 keys that sort like `values` (ascending), with missing values last.
+    Datetimes use their native integer representation; other columns are factorized with sort=True.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # View in the column's own unit (us/s/ns); converting to ns would overflow far-off dates
+        keys = values.to_numpy().view("i8")
+        return np.where(values.isna().to_numpy(), np.iinfo(np.int64).max, keys)
+    codes, uniques = pd.factorize(values, sort=True)
+    return np.where(codes < 0, len(uniques), codes).astype(np.int64)
+
+def write_outputs(outdir: str, df_matches: pd.DataFrame, summary: Dict[str, Any], pretty: bool = False):
     """
     Write three outputs into the specified directory:
       - exposed_accounts.csv : detailed matched rows (CSV)
-      - results.json : structured summary (JSON)
+      - results.json : structured summary (compact JSON; indented if pretty=True)
       - sample_run_results.md : human-readable Markdown report
     """
     os.makedirs(outdir, exist_ok=True)
 
     # CSV of exposed accounts (sorted for readability)
     exposed_csv = os.path.join(outdir, "exposed_accounts.csv")
-    df_to_save = df_matches.copy()
+    df_to_save = df_matches.drop(columns=["_email_lower"], errors="ignore")
     if not df_to_save.empty:
-        df_to_save["breach_date"] = pd.to_datetime(df_to_save["breach_date"], errors="coerce")
-        df_to_save = df_to_save.sort_values(["email", "breach_date", "source"], ascending=[True, True, True])
-    df_to_save.to_csv(exposed_csv, index=False)
+        # Sort by email, breach_date, source using integer keys (missing values last)
+        order = np.lexsort((sort_codes(df_to_save["source"]), sort_codes(df_to_save["breach_date"]),
+                            sort_codes(df_to_save["email"])))
+        df_to_save = df_to_save.iloc[order]
+    # Arrow's columnar CSV writer; breach dates are written as plain dates (NaT -> empty)
+    df_to_save = df_to_save.assign(breach_date=df_to_save["breach_date"].dt.date)
+    table = pa.Table.from_pandas(df_to_save, preserve_index=False)
+    pacsv.write_csv(table, exposed_csv, write_options=pacsv.WriteOptions(batch_size=8192))
 
     # JSON summary
     results_json = os.path.join(outdir, "results.json")
-    with open(results_json, "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2)
+    with open(results_json, "w", encoding="utf-8", buffering=1 << 20) as f:
+        if pretty:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        else:
+            json.dump(summary, f, separators=(",", ":"), ensure_ascii=False)
 
-    # Markdown human-readable report
+    # Markdown human-readable report (rendered in memory, written once)
     md = os.path.join(outdir, "sample_run_results.md")
+    report = render_markdown(summary, df_matches)
     with open(md, "w", encoding="utf-8") as f:
-        f.write(render_markdown(summary, df_matches))
+        f.write(report)
 
     return exposed_csv, results_json, md
 
+def markdown_table(df: pd.DataFrame) -> str:
+    """
+    Render a DataFrame as a left-aligned Markdown pipe table (no index).
+    Same layout as pandas' to_markdown, without needing tabulate.
+    Each column is at least as wide as its header plus 2; missing values render empty.
+    """
+    headers = [str(c) for c in df.columns]
+    cells = df.astype(object).fillna("").to_numpy(dtype=str)
+    widths = np.maximum(np.char.str_len(cells).max(axis=0, initial=0),
+                        np.array([len(h) + 2 for h in headers]))
+    lines = ["| " + " | ".join(h.ljust(w) for h, w in zip(headers, widths)) + " |",
+             "|" + "|".join(":" + "-" * (w + 1) for w in widths) + "|"]
+    lines.extend("| " + " | ".join(v.ljust(w) for v, w in zip(row, widths)) + " |" for row in cells)
+    return "\n".join(lines)
+
 def render_markdown(summary: Dict[str, Any], df_matches: pd.DataFrame) -> str:
     """
     Produce a simple Markdown report summarizing findings.
@@ -237,30 +479,58 @@ def render_markdown(summary: Dict[str, Any], df_matches: pd.DataFrame) -> str:
         lines.append("_N/A_\n")
     else:
         # Show a small sample table of matched rows (first 15)
-        sample = df_matches.copy()
-        sample["breach_date"] = pd.to_datetime(sample["breach_date"], errors="coerce").dt.date
-        sample = sample[["email", "source", "breach_date", "compromised_data"]].head(15)
-        lines.append(sample.to_markdown(index=False))
+        # breach_date is already datetime64 (parsed once in load_offline_dataset)
+        sample = df_matches[["email", "source", "breach_date", "compromised_data"]].head(15)
+        sample = sample.assign(breach_date=sample["breach_date"].dt.date)
+        lines.append(markdown_table(sample))
 
     lines.append("\n---\n**Note:** This report uses an offline sample dataset for demonstration. Live enrichment via HIBP can be enabled with an API key.")
     return "\n".join(lines)
 
 # ---- Optional HIBP lookup (stub with structure; skip if no key/max == 0) ----
 
-def hibp_lookup_many(emails: List[str], max_count: int = 0) -> Dict[str, Any]:
+async def hibp_lookup_one(email: str) -> Dict[str, Any]:
+    """
+    Placeholder for a single HIBP lookup.
+    Minimal placeholder structure; real implementation would call HIBP endpoints.
+    """
+    return {"pwned": False, "breaches": []}
+
+async def hibp_lookup_many_async(emails: List[str], max_count: int = 0, concurrency: int = 4,
+                                 requests_per_second: float = 2.0) -> Dict[str, Any]:
+    """
+    Look up up to max_count emails concurrently (at most `concurrency` in flight).
+    Request starts are paced to `requests_per_second` (HIBP limits are per API key),
+    so total time scales with the allowed rate instead of a fixed sleep per email.
+    """
+    if max_count <= 0:
+        return {}
+    sem = asyncio.Semaphore(concurrency)
+    interval = 1.0 / requests_per_second
+    next_slot = time.monotonic()
+
+    async def lookup(e: str):
+        nonlocal next_slot
+        async with sem:
+            # Reserve the next free start slot, then wait for it (respectful pacing)
+            now = time.monotonic()
+            start = max(now, next_slot)
+            next_slot = start + interval
+            await asyncio.sleep(start - now)
+            return e, await hibp_lookup_one(e)
+
+    results = await asyncio.gather(*(lookup(e) for e in emails[:max_count]))
+    return dict(results)
+
+def hibp_lookup_many(emails: List[str], max_count: int = 0, requests_per_second: float = 2.0) -> Dict[str, Any]:
     """
     Placeholder function to show where HaveIBeenPwned (HIBP) enrichment would happen.
     By default this is a stub to keep the project key-optional and safe to run offline.
+    Runs hibp_lookup_many_async on a fresh event loop.
     """
     if max_count <= 0:
         return {}
-    looked_up = {}
-    for e in emails[:max_count]:
-        # Respectful pacing for any external API (sleep here as a stub)
-        time.sleep(0.5)
-        # Minimal placeholder structure; real implementation would call HIBP endpoints
-        looked_up[e] = {"pwned": False, "breaches": []}
-    return looked_up
+    return asyncio.run(hibp_lookup_many_async(emails, max_count, requests_per_second=requests_per_second))
 
 # ---- Main execution flow ----
 
@@ -268,37 +538,45 @@ def main():
     # Parse CLI args
     args = parse_args()
 
-    # Load the offline dataset (CSV)
-    df = load_offline_dataset(args.offline)
-
-    # Prepare an empty DataFrame with same columns to collect matches
-    selected = pd.DataFrame(columns=df.columns)
-    selected_emails = set()
-
-    # If domain specified, filter dataset for that domain
+    # Read the emails file up front so it can be applied while streaming the dataset
+    ems = read_emails_file(args.emails) if args.emails else []
+
+    def select(chunk: pd.DataFrame) -> np.ndarray:
+        # Union of all filters as a single row mask (each row is selected at most once)
+        mask = np.zeros(len(chunk), dtype=bool)
+        if args.domain:
+            mask |= filter_by_domain(chunk, args.domain)
+        if ems:
+            mask |= filter_by_emails(chunk, ems)
+        return mask
+
+    # Stream the offline dataset (CSV), preferring an up-to-date Parquet copy if configured
+    offline = args.offline
+    if args.offline_parquet:
+        if not parquet_is_fresh(args.offline, args.offline_parquet):
+            save_offline_parquet(args.offline, args.offline_parquet)
+        offline = args.offline_parquet
+    selected = load_offline_dataset(offline, select)
+
+    # Remove duplicate rows if any (breach dumps often repeat identical records)
+    selected = selected.drop_duplicates(subset=[c for c in selected.columns if c != "_email_lower"],
+                                        ignore_index=True)
+
+    # Emails to enrich: the provided list plus every matched address in the domain
+    selected_emails = set(ems)
     if args.domain:
-        selected = pd.concat([selected, filter_by_domain(df, args.domain)], ignore_index=True)
-        selected_emails.update([e for e in selected["email"].unique()])
-
-    # If an emails file specified, read and filter
-    if args.emails:
-        ems = read_emails_file(args.emails)
-        selected_emails.update(ems)
-        selected = pd.concat([selected, filter_by_emails(df, ems)], ignore_index=True)
-
-    # Remove duplicate rows if any
-    selected.drop_duplicates(inplace=True)
+        selected_emails.update(selected.loc[filter_by_domain(selected, args.domain), "email"].unique())
 
     # Summarize matched records
     summary = summarize(selected)
 
     # Optional enrichment: HIBP lookups if requested (max_hibp > 0)
     if args.max_hibp > 0 and selected_emails:
-        enrichment = hibp_lookup_many(sorted(selected_emails), args.max_hibp)
+        enrichment = hibp_lookup_many(sorted(selected_emails), args.max_hibp, args.hibp_rps)
         summary["hibp_enrichment"] = enrichment
 
     # Write outputs (CSV, JSON, Markdown) into the output directory
-    exposed_csv, results_json, md = write_outputs(args.out, selected, summary)
+    exposed_csv, results_json, md = write_outputs(args.out, selected, summary, pretty=args.pretty)
 
     # Print simple terminal messages for the user
     print(f"[+] Saved: {exposed_csv}")